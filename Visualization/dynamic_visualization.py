@@ -1,12 +1,28 @@
+import bisect
 import json
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Slider
+from matplotlib.animation import FuncAnimation
+from matplotlib.collections import PolyCollection
 import matplotlib.gridspec as gridspec
 import time
 import matplotlib
 matplotlib.use('TkAgg')  # Use TkAgg backend for better interactivity
 
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; fall back to plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
 class SIRNVisualizer:
     """Simplified class for dynamic visualization of SIRN model data with scrolling support."""
     
@@ -17,9 +33,8 @@ class SIRNVisualizer:
         Args:
             auto_display (bool): Whether to automatically show the visualization window
         """
-        self.data = {}
-        self.cities = []
-        self.time_steps = []
+        self.cities = []  # Integer city identifiers, sorted
+        self.time_steps = []  # Integer time steps, sorted
         self.current_time_idx = 0
         self.auto_display = auto_display
         self.window_shown = False
@@ -33,6 +48,10 @@ class SIRNVisualizer:
         
         # Placeholders
         self.pie_axes = []
+        self.pie_wedges = []
+        self.pie_labels = []
+        self.pie_pcts = []
+        self.pie_empty = []
         self.heatmap_s = None
         self.heatmap_i = None
         self.heatmap_r = None
@@ -41,16 +60,78 @@ class SIRNVisualizer:
         self.r_img = None
         self.slider = None
         self.slider_ax = None
+        self._vlines = []
+        self._xticks = []
+        self._xticklabels = []
+        self._yticks = []
+        self._yticklabels = []
+        
+        # Raw [S, I, R, N] values, shape (cities, capacity, 4), and the derived
+        # percentages, shape (cities, capacity), indexed through the city and
+        # time step lookups below. Only the first len(time_steps) columns are
+        # filled; the spare capacity lets new time steps be appended in place.
+        # The percentages only feed the heatmaps, so single precision is plenty
+        # and halves the bytes copied on every image update.
+        self.city_to_idx = {}
+        self.time_to_idx = {}
+        self._buf_capacity_t = 0
+        self._raw = np.zeros((0, 0, 4), dtype=np.float64)
+        self._s_buf = np.zeros((0, 0), dtype=np.float32)
+        self._i_buf = np.zeros((0, 0), dtype=np.float32)
+        self._r_buf = np.zeros((0, 0), dtype=np.float32)
+        self._set_views()
+        
+        # Cities whose pie charts need redrawing, and the time step last drawn
+        self.dirty_cities = set()
+        self._drawn_time = None
+        
+        # For blitting: artists redrawn over the cached figure background
+        self._animated = []
+        self._background = None
+        self._animation = None  # Running replay, which does its own blitting
+        self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+        
+        # For throttling: redraws requested within redraw_interval seconds of
+        # the last one are coalesced into a single timer-driven redraw
+        self.redraw_interval = 0.05
+        self._pending_redraw = False
+        self._last_draw = 0.0
+        self._redraw_timer = self.fig.canvas.new_timer(interval=int(self.redraw_interval * 1000))
+        self._redraw_timer.single_shot = True
+        self._redraw_timer.add_callback(self.flush)
+        
+        # Set once initialize has laid out a known list of cities; the layout is
+        # then never rebuilt, and data for any other city is ignored
+        self._layout_built = False
+        self._ignored_cities = set()
+        
+        # Pie row count the last tight layout was solved for, and its result
+        self._layout_done_for = None
+        self._layout_params = None
         
         # For scrolling
         self.scroll_step = 0.1  # Fraction of figure height to scroll per wheel event
         self.scroll_pos = 0.0   # Current scroll position (0 = top, 1 = bottom)
+        
+        # Scroll events arriving within scroll_interval seconds of each other
+        # are applied together, with one relayout and redraw
+        self.scroll_interval = 0.03
+        self._pending_scroll = False
+        self._scroll_timer = self.fig.canvas.new_timer(interval=int(self.scroll_interval * 1000))
+        self._scroll_timer.single_shot = True
+        self._scroll_timer.add_callback(self._apply_scroll)
+        self._scroll_connected = False
     
     def _setup_layout(self):
         """Set up the layout based on number of cities."""
         # Clear existing figure
         self.fig.clear()
         self.pie_axes = []
+        self.pie_wedges = []
+        self.pie_labels = []
+        self.pie_pcts = []
+        self.pie_empty = []
+        self._animated = []
         
         # Calculate dimensions based on number of cities
         num_cities = len(self.cities)
@@ -67,13 +148,30 @@ class SIRNVisualizer:
         total_rows = pie_rows + 4  # Pie charts + 3 heatmaps + slider
         self.gs = gridspec.GridSpec(total_rows, 3, figure=self.fig, height_ratios=[4] * pie_rows + [3, 3, 3, 0.5])
         
-        # Create pie chart subplots
+        # Create pie chart subplots with persistent wedges and labels; the three
+        # wedges of each pie are one collection whose vertices are replaced
         for i, city in enumerate(self.cities):
             row = i // 3
             col = i % 3
             ax = self.fig.add_subplot(self.gs[row, col])
-            ax.set_title(f'City {city}')
+            # Title inside the axes, above the pie, so blitting the axes covers it
+            ax.set_title(f'City {city}', y=1.0, pad=-14)
+            ax.set(frame_on=False, xticks=[], yticks=[], xlim=(-1.25, 1.25), ylim=(-1.25, 1.5), aspect='equal')
+            
+            wedges = ax.add_collection(PolyCollection([], facecolors=['blue', 'red', 'green'],
+                                                      linewidths=0, visible=False))
+            labels = [ax.text(0, 0, label, va='center', visible=False) for label in ['S', 'I', 'R']]
+            pcts = [ax.text(0, 0, '', ha='center', va='center', color='white', visible=False) for _ in range(3)]
+            empty = ax.text(0.5, 0.5, 'No data', ha='center', va='center', transform=ax.transAxes, visible=False)
+            
             self.pie_axes.append(ax)
+            self.pie_wedges.append(wedges)
+            self.pie_labels.append(tuple(labels))
+            self.pie_pcts.append(tuple(pcts))
+            self.pie_empty.append(empty)
+            for artist in [wedges] + labels + pcts + [empty, ax.title]:
+                artist.set_animated(True)
+                self._animated.append(artist)
         
         # Create heatmap axes
         self.heatmap_s = self.fig.add_subplot(self.gs[pie_rows, :])
@@ -84,14 +182,41 @@ class SIRNVisualizer:
         self.heatmap_i.set_title('Infected Population (% of total)')
         self.heatmap_r.set_title('Recovered Population (% of total)')
         
-        # Reset heatmap images
-        self.s_img = None
-        self.i_img = None
-        self.r_img = None
+        # Create the heatmap images, their colorbars and the current time
+        # markers once per layout; updates only replace the image data. They
+        # stay hidden until there is data to show.
+        has_data = self.s_data.size > 0
+        images = []
+        self._vlines = []
+        for ax, data, cmap in [(self.heatmap_s, self.s_data, 'Blues'),
+                               (self.heatmap_i, self.i_data, 'Reds'),
+                               (self.heatmap_r, self.r_data, 'Greens')]:
+            img = ax.imshow(data if has_data else np.zeros((1, 1)), aspect='auto', cmap=cmap,
+                            vmin=0, vmax=100, visible=has_data, animated=True)
+            colorbar = self.fig.colorbar(img, ax=ax)
+            colorbar.set_label('% of population')
+            line = ax.axvline(x=self.current_time_idx, color='black', linestyle='--',
+                              visible=has_data, animated=True)
+            images.append(img)
+            self._vlines.append(line)
+            self._animated.extend([img, line])
+        self.s_img, self.i_img, self.r_img = images
+        self._drawn_time = None
+        self._yticks = list(range(num_cities))
+        self._yticklabels = [str(city) for city in self.cities]
+        self._update_ticks()
         
         # Slider for time
         self.slider_ax = self.fig.add_subplot(self.gs[-1, :])
         self.slider = Slider(self.slider_ax, 'Time Step', 0, 1, valinit=0, valstep=1)
+        self.slider.drawon = False  # Redrawn by update_plots
+        # The knob, its handle and the value text move with the slider, so they
+        # are kept out of the cached background; the handle and text extend
+        # beyond the slider axes. The initial value marker is drawn with them
+        # to stay on top of the knob.
+        for artist in (self.slider.poly, self.slider.vline, self.slider._handle, self.slider.valtext):
+            artist.set_animated(True)
+            self._animated.append(artist)
         self.slider.on_changed(self.update_time)
         
         # Set up scrolling
@@ -101,12 +226,28 @@ class SIRNVisualizer:
         self.scroll_pos = 0.0
         self._update_scroll()
         
-        plt.tight_layout()
+        # The tight layout only depends on the grid, so it is solved once per
+        # number of pie rows and reapplied when a city fills an existing row
+        if self._layout_done_for == pie_rows:
+            self.fig.subplots_adjust(**self._layout_params)
+        else:
+            plt.tight_layout()
+            params = self.fig.subplotpars
+            self._layout_params = {name: getattr(params, name)
+                                   for name in ('left', 'bottom', 'right', 'top', 'wspace', 'hspace')}
+            self._layout_done_for = pie_rows
+        
+        # Any cached background predates the new layout
+        self._background = None
     
     def _setup_scrolling(self):
         """Set up event handlers for scrolling."""
+        # The canvas outlives layout rebuilds, so connect only once
+        if self._scroll_connected:
+            return
         self.fig.canvas.mpl_connect('scroll_event', self._on_scroll)
         self.fig.canvas.mpl_connect('key_press_event', self._on_key)
+        self._scroll_connected = True
     
     def _on_scroll(self, event):
         """Handle mouse wheel scroll events."""
@@ -117,29 +258,44 @@ class SIRNVisualizer:
             # Scroll down (increase position)
             self.scroll_pos = min(1, self.scroll_pos + self.scroll_step)
         
-        self._update_scroll()
+        self._schedule_scroll()
     
     def _on_key(self, event):
         """Handle keyboard scroll events."""
         if event.key == 'up':
             # Scroll up
             self.scroll_pos = max(0, self.scroll_pos - self.scroll_step)
-            self._update_scroll()
+            self._schedule_scroll()
         elif event.key == 'down':
             # Scroll down
             self.scroll_pos = min(1, self.scroll_pos + self.scroll_step)
-            self._update_scroll()
+            self._schedule_scroll()
         elif event.key == 'home':
             # Scroll to top
             self.scroll_pos = 0
-            self._update_scroll()
+            self._schedule_scroll()
         elif event.key == 'end':
             # Scroll to bottom
             self.scroll_pos = 1
-            self._update_scroll()
+            self._schedule_scroll()
+    
+    def _schedule_scroll(self):
+        """Apply the scroll position shortly, together with any further scroll events."""
+        if self._pending_scroll:
+            return
+        self._pending_scroll = True
+        self._scroll_timer.start()
+    
+    def _apply_scroll(self):
+        """Apply a scroll position left waiting by _schedule_scroll."""
+        self._pending_scroll = False
+        self._update_scroll()
     
     def _update_scroll(self):
         """Update the figure's viewport based on current scroll position."""
+        # The replay's cached backgrounds do not survive moving the axes
+        self._stop_replay()
+        
         # Get figure manager
         manager = plt.get_current_fig_manager()
         
@@ -155,10 +311,151 @@ class SIRNVisualizer:
         self.fig.subplots_adjust(top=1.0-top/figure_height, bottom=max(0, 1.0-(top+screen_height)/figure_height))
         
         # Redraw the figure
+        self._background = None
         self.fig.canvas.draw_idle()
     
+    def _on_draw(self, event):
+        """Cache the figure background after a full redraw."""
+        if event is not None and event.canvas != self.fig.canvas:
+            return
+        if not self.fig.canvas.supports_blit:
+            return
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        
+        # A running replay caches its own backgrounds, which must not contain
+        # the animated artists, and redraws them on its next frame
+        if self._animation is None:
+            self._draw_animated()
+    
+    def _draw_animated(self):
+        """Draw the animated artists on top of the current canvas."""
+        for artist in self._animated:
+            self.fig.draw_artist(artist)
+    
+    def _redraw(self, full=False):
+        """Blit the animated artists, falling back to a full redraw when needed."""
+        if full or self._background is None:
+            self._background = None
+            self.fig.canvas.draw_idle()
+            return
+        
+        canvas = self.fig.canvas
+        canvas.restore_region(self._background)
+        self._draw_animated()
+        canvas.blit(self.fig.bbox)
+    
+    def _set_views(self):
+        """Point the percentage arrays at the filled part of their buffers."""
+        num_times = len(self.time_steps)
+        self.s_data = self._s_buf[:, :num_times]
+        self.i_data = self._i_buf[:, :num_times]
+        self.r_data = self._r_buf[:, :num_times]
+    
+    def _reallocate(self, num_cities, capacity, rows, cols):
+        """
+        Allocate new data buffers, moving the existing data to new positions.
+        
+        Args:
+            num_cities (int): Number of rows in the new buffers
+            capacity (int): Number of time step columns in the new buffers
+            rows (list): New row index of each existing row
+            cols (list): New column index of each existing filled column
+        """
+        index = np.ix_(rows, cols)
+        num_filled = len(cols)
+        
+        raw = np.zeros((num_cities, capacity, 4), dtype=np.float64)
+        raw[index] = self._raw[:, :num_filled]
+        self._raw = raw
+        
+        for name in ['_s_buf', '_i_buf', '_r_buf']:
+            buf = np.zeros((num_cities, capacity), dtype=np.float32)
+            buf[index] = getattr(self, name)[:, :num_filled]
+            setattr(self, name, buf)
+        self._buf_capacity_t = capacity
+    
+    def _append_time_column(self, time_step):
+        """
+        Add a new time step and an empty column for it in the data arrays.
+        
+        Returns:
+            int: Index of the new time step
+        """
+        num_times = len(self.time_steps)
+        
+        # Grow the buffers geometrically so appends are amortized O(1)
+        if num_times + 1 > self._buf_capacity_t:
+            self._reallocate(len(self.cities), max(1, 2 * self._buf_capacity_t),
+                             range(len(self.cities)), range(num_times))
+        
+        t_idx = bisect.bisect_left(self.time_steps, time_step)
+        self.time_steps.insert(t_idx, time_step)
+        
+        # Shift later columns right when inserting before the end
+        for buf in [self._raw, self._s_buf, self._i_buf, self._r_buf]:
+            buf[:, t_idx + 1:num_times + 1] = buf[:, t_idx:num_times]
+            buf[:, t_idx] = 0
+        self._set_views()
+        
+        # Only time steps after the new one shift position
+        for idx in range(t_idx, len(self.time_steps)):
+            self.time_to_idx[self.time_steps[idx]] = idx
+        return t_idx
+    
+    def _add_time_steps(self, time_steps):
+        """Add empty columns for any new time steps, keeping the time steps sorted."""
+        new_steps = [t for t in dict.fromkeys(time_steps) if t not in self.time_to_idx]
+        if not new_steps:
+            return
+        
+        old_steps = self.time_steps
+        self.time_steps = sorted(old_steps + new_steps)
+        self.time_to_idx = {t: idx for idx, t in enumerate(self.time_steps)}
+        
+        # Move the existing columns to their new positions
+        cols = [self.time_to_idx[t] for t in old_steps]
+        capacity = max(len(self.time_steps), self._buf_capacity_t)
+        self._reallocate(len(self.cities), capacity, range(len(self.cities)), cols)
+        self._set_views()
+    
+    def _add_cities(self, cities):
+        """
+        Add rows for any new cities, keeping the cities sorted.
+        
+        Returns:
+            bool: Whether any city was added
+        """
+        new_cities = [city for city in dict.fromkeys(cities) if city not in self.city_to_idx]
+        if not new_cities:
+            return False
+        
+        old_cities = list(self.cities)
+        for city in new_cities:
+            c_idx = bisect.bisect_left(self.cities, city)
+            self.cities.insert(c_idx, city)
+        self.city_to_idx = {city: idx for idx, city in enumerate(self.cities)}
+        
+        # Move the existing rows to their new positions
+        rows = [self.city_to_idx[city] for city in old_cities]
+        self._reallocate(len(self.cities), self._buf_capacity_t, rows, range(len(self.time_steps)))
+        self._set_views()
+        return True
+    
+    def _write_cell(self, c_idx, t_idx, S, I, R, N):
+        """Store one [S, I, R, N] value and its percentages."""
+        self._raw[c_idx, t_idx] = (S, I, R, N)
+        if N > 0:
+            self._s_buf[c_idx, t_idx] = S / N * 100
+            self._i_buf[c_idx, t_idx] = I / N * 100
+            self._r_buf[c_idx, t_idx] = R / N * 100
+        else:
+            self._s_buf[c_idx, t_idx] = 0
+            self._i_buf[c_idx, t_idx] = 0
+            self._r_buf[c_idx, t_idx] = 0
+    
     def update_time(self, val):
         """Handle slider value changes."""
+        self._stop_replay()
         self.current_time_idx = int(val)
         self.update_plots()
     
@@ -168,29 +465,9 @@ class SIRNVisualizer:
             print("Cannot update arrays: no cities or time steps")
             return
         
-        num_cities = len(self.cities)
-        num_times = len(self.time_steps)
-        
-        # Create new arrays
-        self.s_data = np.zeros((num_cities, num_times))
-        self.i_data = np.zeros((num_cities, num_times))
-        self.r_data = np.zeros((num_cities, num_times))
-        
-        # Fill with data
-        for c_idx, city in enumerate(self.cities):
-            for t_idx, time in enumerate(self.time_steps):
-                t_str = str(time)
-                if city in self.data and t_str in self.data[city]:
-                    values = self.data[city][t_str]
-                    s_val = float(values[0])
-                    i_val = float(values[1])
-                    r_val = float(values[2])
-                    n_val = float(values[3]) if len(values) > 3 else (s_val + i_val + r_val)
-                    
-                    if n_val > 0:
-                        self.s_data[c_idx, t_idx] = (s_val / n_val) * 100
-                        self.i_data[c_idx, t_idx] = (i_val / n_val) * 100
-                        self.r_data[c_idx, t_idx] = (r_val / n_val) * 100
+        # Percentages of the total population, zero where N is zero
+        self._set_views()
+        _fill_percentages(self._raw[:, :len(self.time_steps)], self.s_data, self.i_data, self.r_data)
     
     def update_slider_range(self):
         """Update the slider range based on current time steps."""
@@ -204,17 +481,39 @@ class SIRNVisualizer:
         self.slider.valmax = max_val
         self.slider.ax.set_xlim(0, max_val)
         
+        # Time step labels, at most about ten of them
+        step = max(1, len(self.time_steps) // 10)
+        self._xticks = list(range(0, len(self.time_steps), step))
+        self._xticklabels = [str(self.time_steps[i]) for i in self._xticks]
+        self._update_ticks()
+        
         # Adjust current index if needed
         if self.current_time_idx > max_val:
             self.current_time_idx = max_val
             
-        self.slider.set_val(self.current_time_idx)
+        self._set_slider(self.current_time_idx)
+    
+    def _set_slider(self, idx):
+        """Move the slider without triggering a redraw."""
+        self.slider.eventson = False
+        self.slider.set_val(idx)
+        self.slider.eventson = True
     
     def update_plots(self):
         """Update all visualization elements."""
         if not self.time_steps or not self.cities:
             return
         
+        full_redraw = self._update_artists()
+        self._redraw(full=full_redraw)
+    
+    def _update_artists(self):
+        """
+        Update the artists for the current time step without drawing them.
+        
+        Returns:
+            bool: Whether the change requires a full redraw rather than a blit
+        """
         # Get current time step
         if self.current_time_idx >= len(self.time_steps):
             self.current_time_idx = len(self.time_steps) - 1
@@ -222,99 +521,141 @@ class SIRNVisualizer:
         current_time = self.time_steps[self.current_time_idx]
         time_str = str(current_time)
         
+        # Redraw every pie when the time changes, otherwise only changed cities.
+        # The time step itself is compared, as inserting an earlier time step
+        # can put a different one at the same index.
+        time_changed = current_time != self._drawn_time
+        self._drawn_time = current_time
+        if time_changed:
+            pie_indices = range(len(self.cities))
+        else:
+            pie_indices = [i for i, city in enumerate(self.cities) if city in self.dirty_cities]
+        self.dirty_cities.clear()
+        
         # Update pie charts
-        for i, city in enumerate(self.cities):
-            if i < len(self.pie_axes):
-                self.pie_axes[i].clear()
-                if city in self.data and time_str in self.data[city]:
-                    # Get data
-                    values = self.data[city][time_str]
-                    s_val = float(values[0])
-                    i_val = float(values[1])
-                    r_val = float(values[2])
-                    
-                    # Create pie
-                    wedges, texts, autotexts = self.pie_axes[i].pie(
-                        [s_val, i_val, r_val],
-                        labels=['S', 'I', 'R'],
-                        colors=['blue', 'red', 'green'],
-                        autopct='%1.1f%%'
-                    )
-                    # Make text white for visibility
-                    for autotext in autotexts:
-                        autotext.set_color('white')
-                    self.pie_axes[i].set_title(f'City {city} at Time {time_str}')
-                else:
-                    self.pie_axes[i].text(0.5, 0.5, 'No data', ha='center', va='center', transform=self.pie_axes[i].transAxes)
-                    self.pie_axes[i].set_title(f'City {i}')
+        self._update_pies([i for i in pie_indices if i < len(self.pie_axes)], time_str)
         
         # Update heatmaps
+        full_redraw = False
         if self.s_data.size > 0:
-            # Clear time markers
-            for ax in [self.heatmap_s, self.heatmap_i, self.heatmap_r]:
-                for line in ax.get_lines():
-                    line.remove()
+            images = [self.s_img, self.i_img, self.r_img]
+            for img, data in zip(images, [self.s_data, self.i_data, self.r_data]):
+                img.set_data(data)
             
-            # Update heatmap data
-            if self.s_img is None:
-                # Remove old colorbar if it exists
-                if hasattr(self, 's_colorbar') and self.s_colorbar:
-                    self.s_colorbar.remove()
-                    
-                self.heatmap_s.clear()
-                self.s_img = self.heatmap_s.imshow(self.s_data, aspect='auto', cmap='Blues', vmin=0, vmax=100)
-                # Store colorbar to prevent duplication
-                self.s_colorbar = self.fig.colorbar(self.s_img, ax=self.heatmap_s)
-                self.s_colorbar.set_label('% of population')
-                self.heatmap_s.set_title('Susceptible Population (% of total)')
-            else:
-                self.s_img.set_data(self.s_data)
+            # Stretch the images over any newly added cities or time steps
+            extent = [-0.5, self.s_data.shape[1] - 0.5, self.s_data.shape[0] - 0.5, -0.5]
+            for img in images:
+                if list(img.get_extent()) != extent:
+                    img.set_extent(extent)
+                    full_redraw = True
             
-            if self.i_img is None:
-                # Remove old colorbar if it exists
-                if hasattr(self, 'i_colorbar') and self.i_colorbar:
-                    self.i_colorbar.remove()
-                    
-                self.heatmap_i.clear()
-                self.i_img = self.heatmap_i.imshow(self.i_data, aspect='auto', cmap='Reds', vmin=0, vmax=100)
-                # Store colorbar to prevent duplication
-                self.i_colorbar = self.fig.colorbar(self.i_img, ax=self.heatmap_i)
-                self.i_colorbar.set_label('% of population')
-                self.heatmap_i.set_title('Infected Population (% of total)')
-            else:
-                self.i_img.set_data(self.i_data)
+            # Highlight current time, whose index moves when an earlier time
+            # step is inserted even if the time itself is unchanged
+            for line in self._vlines:
+                line.set_xdata([self.current_time_idx, self.current_time_idx])
             
-            if self.r_img is None:
-                # Remove old colorbar if it exists
-                if hasattr(self, 'r_colorbar') and self.r_colorbar:
-                    self.r_colorbar.remove()
-                    
-                self.heatmap_r.clear()
-                self.r_img = self.heatmap_r.imshow(self.r_data, aspect='auto', cmap='Greens', vmin=0, vmax=100)
-                # Store colorbar to prevent duplication
-                self.r_colorbar = self.fig.colorbar(self.r_img, ax=self.heatmap_r)
-                self.r_colorbar.set_label('% of population')
-                self.heatmap_r.set_title('Recovered Population (% of total)')
-            else:
-                self.r_img.set_data(self.r_data)
+            # Show the images and markers once the first data arrives
+            if not self.s_img.get_visible():
+                for artist in images + self._vlines:
+                    artist.set_visible(True)
+                full_redraw = True
+        
+        return full_redraw
+    
+    def animate(self, interval=100):
+        """
+        Replay all time steps from the start as a blitted animation.
+        Scrolling or moving the slider stops the replay.
+        
+        Args:
+            interval (int): Delay between frames in milliseconds
+        """
+        self._stop_replay()
+        self._animation = FuncAnimation(self.fig, self._frame, frames=len(self.time_steps),
+                                        init_func=self._init_artists, blit=True,
+                                        interval=interval, repeat=False)
+    
+    def _init_artists(self):
+        """Return the artists redrawn on every replay frame."""
+        # The slider's handle and labels lie outside its axes, where the replay
+        # cannot blit them, so they are left to the final redraw
+        return tuple(a for a in self._animated
+                     if a is not self.slider.valtext and a is not self.slider._handle)
+    
+    def _frame(self, i):
+        """Show time step i of the replay and return the artists to blit."""
+        self.current_time_idx = i
+        self._set_slider(i)
+        self._update_artists()
+        
+        # After the last frame the normal redraw path takes over again
+        if i == len(self.time_steps) - 1:
+            self._animation = None
+            self._redraw(full=True)
+        return self._init_artists()
+    
+    def _stop_replay(self):
+        """Stop a running replay."""
+        if self._animation is None:
+            return
+        self._animation.pause()
+        self._animation = None
+        
+        # Pausing un-animates the replayed artists
+        for artist in self._animated:
+            artist.set_animated(True)
+        self._redraw(full=True)
+    
+    def _update_ticks(self):
+        """Apply the cached tick labels to all heatmaps."""
+        for ax in [self.heatmap_s, self.heatmap_i, self.heatmap_r]:
+            ax.set_yticks(self._yticks)
+            ax.set_yticklabels(self._yticklabels)
+            ax.set_xlabel('Time Step')
+            ax.set_xticks(self._xticks)
+            ax.set_xticklabels(self._xticklabels)
+        
+        # The ticks are part of the cached background
+        self._background = None
+    
+    def _update_pies(self, indices, time_str):
+        """Update the wedges and labels of the given cities' pie charts in place."""
+        if not indices:
+            return
+        
+        # Wedge boundaries in radians for all the pies at once, counterclockwise
+        # from 0 like ax.pie
+        values = self._raw[indices, self.current_time_idx, :3]
+        totals = values.sum(axis=1, keepdims=True)
+        fractions = np.zeros_like(values)
+        np.divide(values, totals, out=fractions, where=totals > 0)
+        theta = np.concatenate([np.zeros((len(indices), 1)), np.cumsum(fractions, axis=1) * 2 * np.pi], axis=1)
+        verts = _pie_vertices(theta)
+        mid = (theta[:, :-1] + theta[:, 1:]) / 2
+        mid_x, mid_y = np.cos(mid), np.sin(mid)
+        
+        for j, i in enumerate(indices):
+            ax = self.pie_axes[i]
+            wedges = self.pie_wedges[i]
+            pcts = self.pie_pcts[i]
+            labels = self.pie_labels[i]
             
-            # Update labels and ticks for all heatmaps
-            for ax in [self.heatmap_s, self.heatmap_i, self.heatmap_r]:
-                ax.set_yticks(range(len(self.cities)))
-                ax.set_yticklabels(self.cities)
-                ax.set_xlabel('Time Step')
-                
-                # Time step labels
-                step = max(1, len(self.time_steps) // 10)
-                ticks = range(0, len(self.time_steps), step)
-                ax.set_xticks(ticks)
-                ax.set_xticklabels([str(self.time_steps[i]) for i in ticks])
-                
-                # Highlight current time
-                ax.axvline(x=self.current_time_idx, color='black', linestyle='--')
-        
-        # Force redraw
-        self.fig.canvas.draw_idle()
+            has_data = totals[j, 0] > 0
+            for artist in (wedges,) + pcts + labels:
+                artist.set_visible(has_data)
+            self.pie_empty[i].set_visible(not has_data)
+            if not has_data:
+                ax.title.set_text(f'City {i}')
+                continue
+            
+            wedges.set_verts(verts[j])
+            for k in range(3):
+                x, y = mid_x[j, k], mid_y[j, k]
+                labels[k].set_position((1.1 * x, 1.1 * y))
+                labels[k].set_horizontalalignment('left' if x > 0 else 'right')
+                pcts[k].set_position((0.6 * x, 0.6 * y))
+                pcts[k].set_text('%1.1f%%' % (fractions[j, k] * 100))
+            ax.title.set_text(f'City {self.cities[i]} at Time {time_str}')
     
     def add_data_point(self, city, time_step, values):
         """
@@ -325,9 +666,9 @@ class SIRNVisualizer:
             time_step: Time step (integer or string)
             values: List of [S, I, R, N] values for the SIRN model
         """
-        # Convert to strings for dictionary keys
-        city_str = str(city)
-        time_str = str(time_step)
+        # Parse the identifiers once; they are kept as integers internally
+        city = int(city)
+        time_step = int(time_step)
         
         # Ensure window is shown if auto_display is enabled
         if self.auto_display and not self.window_shown:
@@ -340,48 +681,138 @@ class SIRNVisualizer:
             plt.pause(0.5)
             self.window_shown = True
         
-        # Add city if new
-        if city_str not in self.data:
-            self.data[city_str] = {}
-            if city_str not in self.cities:
-                self.cities.append(city_str)
-                self.cities.sort(key=int)
-                # Update the layout when cities change
-                self._setup_layout()
-        
-        # Add data point
-        self.data[city_str][time_str] = values
+        # Add city if new, updating the layout when cities change
+        if city not in self.city_to_idx:
+            if self._layout_built:
+                self._ignore_cities([city])
+                return
+            self._add_cities([city])
+            self._setup_layout()
         
         # Add time step if new
-        if time_step not in self.time_steps:
-            self.time_steps.append(time_step)
-            self.time_steps.sort()
-            
-            # Update arrays and slider
-            self.update_data_arrays()
+        t_idx = self.time_to_idx.get(time_step)
+        if t_idx is None:
+            t_idx = self._append_time_column(time_step)
             self.update_slider_range()
         
-        # Update the visualization
-        self.current_time_idx = self.time_steps.index(time_step)
-        self.slider.set_val(self.current_time_idx)
+        # Write only the changed cell, filling N as the sum when it is omitted
+        c_idx = self.city_to_idx[city]
+        S, I, R = (float(v) for v in values[:3])
+        N = float(values[3]) if len(values) > 3 else S + I + R
+        self._write_cell(c_idx, t_idx, S, I, R, N)
+        self.dirty_cities.add(city)
+        
+        # Update the visualization once the redraw timer allows
+        self.current_time_idx = t_idx
+        self._set_slider(self.current_time_idx)
+        self._schedule_redraw()
+    
+    def _ignore_cities(self, cities):
+        """Report cities that arrive after initialize fixed the layout, once each."""
+        for city in cities:
+            if city not in self._ignored_cities:
+                self._ignored_cities.add(city)
+                print(f"Ignoring data for city {city}: cities are frozen after initialize")
+    
+    def _schedule_redraw(self):
+        """Redraw now, or coalesce with other updates if the last redraw was recent."""
+        # The timer only fires while GUI events are processed, so once the
+        # interval has passed the redraw is done directly, even if one is
+        # already pending; otherwise a caller that never processes events
+        # (e.g. one using time.sleep) would not see any more updates
+        if time.monotonic() - self._last_draw > self.redraw_interval:
+            self._pending_redraw = True
+            self.flush()
+        elif not self._pending_redraw:
+            self._pending_redraw = True
+            self._redraw_timer.start()
+    
+    def flush(self):
+        """Draw any updates still waiting for the redraw timer."""
+        if not self._pending_redraw:
+            return
+        self._pending_redraw = False
+        self._redraw_timer.stop()
+        self._last_draw = time.monotonic()
+        self.update_plots()
+    
+    def get_data_point(self, city, time_step):
+        """
+        Get the stored data point for a city and time step.
+        
+        Args:
+            city: City identifier (integer or string)
+            time_step: Time step (integer or string)
+            
+        Returns:
+            list: [S, I, R, N] values, or None if there is no such data point
+        """
+        c_idx = self.city_to_idx.get(int(city))
+        t_idx = self.time_to_idx.get(int(time_step))
+        if c_idx is None or t_idx is None:
+            return None
+        return self._raw[c_idx, t_idx].tolist()
+    
+    def set_data(self, data, time_steps=None):
+        """
+        Load a whole dataset at once and update the visualization.
+        
+        Args:
+            data (dict): SIRN data of the form {city: {time_step: [S, I, R, N]}}
+            time_steps (list): Optional sorted time steps in data, to avoid rescanning it
+        """
+        cities = [int(city) for city in data]
+        if self._layout_built:
+            self._ignore_cities([city for city in cities if city not in self.city_to_idx])
+            cities_changed = False
+        else:
+            cities_changed = self._add_cities(cities)
+        
+        # Lay out every time step first, then fill the raw array in one pass
+        if time_steps is None:
+            _, time_steps = get_cities_and_time_steps(data)
+        self._add_time_steps(time_steps)
+        
+        # Resolve each distinct time key to its column once, not once per city,
+        # and gather the values so the raw array is written in one assignment
+        columns = {t: self.time_to_idx[int(t)] for t in set().union(*data.values()) if str(t).isdigit()}
+        rows, cols, values_list = [], [], []
+        for city, city_data in data.items():
+            c_idx = self.city_to_idx.get(int(city))
+            if c_idx is None:
+                continue
+            for t, values in city_data.items():
+                t_idx = columns.get(t)
+                if t_idx is not None:
+                    rows.append(c_idx)
+                    cols.append(t_idx)
+                    values_list.append(values[:4] if len(values) >= 4 else list(values[:3]) + [sum(values[:3])])
+        if values_list:
+            self._raw[rows, cols] = values_list
+        
+        if cities_changed:
+            self._setup_layout()
+        self.update_data_arrays()
+        self.update_slider_range()
+        
+        # Any city's values may have changed, so every pie is redrawn
+        self._drawn_time = None
         self.update_plots()
     
     def initialize(self, cities_list=None):
         """
         Initialize the visualizer with a list of cities.
         This method should be called before adding data points if cities are known in advance.
+        The layout is then fixed, and data for cities not in the list is ignored.
         
         Args:
             cities_list (list): Optional list of city identifiers
         """
         if cities_list:
-            for city in cities_list:
-                if city not in self.cities:
-                    self.cities.append(str(city))
-            
-            # Sort and setup layout
-            self.cities.sort(key=int)
+            # Add the cities in sorted order and setup layout
+            self._add_cities([int(city) for city in cities_list])
             self._setup_layout()
+            self._layout_built = True
             
             # Show window if auto_display is enabled
             if self.auto_display and not self.window_shown:
@@ -399,6 +830,7 @@ class SIRNVisualizer:
         Switch to blocking mode and wait for the window to be closed.
         Call this at the end of your program to keep the visualization window open.
         """
+        self.flush()
         if not self.window_shown and self.auto_display:
             plt.show(block=False)
             self.window_shown = True
@@ -406,11 +838,65 @@ class SIRNVisualizer:
         plt.ioff()
         plt.show(block=True)
 
+@njit(cache=True)
+def _fill_percentages(raw, s_out, i_out, r_out):
+    """
+    Convert raw [S, I, R, N] values to percentages of N, zero where N is zero.
+    
+    Args:
+        raw (ndarray): Raw values, shape (cities, time steps, 4)
+        s_out, i_out, r_out (ndarray): Output percentages, shape (cities, time steps)
+    """
+    n = raw[:, :, 3]
+    has_n = n > 0
+    scale = np.where(has_n, 100.0 / np.where(has_n, n, 1.0), 0.0)
+    s_out[:, :] = raw[:, :, 0] * scale
+    i_out[:, :] = raw[:, :, 1] * scale
+    r_out[:, :] = raw[:, :, 2] * scale
+
+def _pie_vertices(theta, num_points=64):
+    """
+    Compute the polygon vertices of pie wedges of unit radius.
+    
+    Args:
+        theta (ndarray): Wedge boundary angles in radians, shape (pies, wedges + 1)
+        num_points (int): Number of points along each wedge's arc
+        
+    Returns:
+        ndarray: Vertices of shape (pies, wedges, num_points + 1, 2), each wedge
+        starting at the centre
+    """
+    steps = np.linspace(0, 1, num_points)
+    start = theta[:, :-1, np.newaxis]
+    angles = start + (theta[:, 1:, np.newaxis] - start) * steps
+    verts = np.zeros(angles.shape[:2] + (num_points + 1, 2))
+    verts[:, :, 1:, 0] = np.cos(angles)
+    verts[:, :, 1:, 1] = np.sin(angles)
+    return verts
+
 def load_data(file_path):
-    """Load data from a JSON file."""
+    """Load data from a JSON file, with orjson's parser when it is installed."""
+    if orjson is not None:
+        with open(file_path, 'rb') as f:
+            return orjson.loads(f.read())
     with open(file_path, 'r') as f:
         return json.load(f)
 
+def get_cities_and_time_steps(data):
+    """
+    Get the sorted cities and time steps in a dataset.
+    
+    Args:
+        data (dict): SIRN data of the form {city: {time_step: [S, I, R, N]}}
+        
+    Returns:
+        tuple: (cities, time_steps) with cities as strings and time steps as integers
+    """
+    cities = sorted(data.keys(), key=int)
+    # Collect the distinct keys first so each is checked and converted once
+    time_steps = sorted(int(t) for t in set().union(*data.values()) if str(t).isdigit())
+    return cities, time_steps
+
 def run_static_visualization(data_file):
     """Run the visualization with all data loaded initially."""
     print("Running static visualization...")
@@ -419,11 +905,7 @@ def run_static_visualization(data_file):
     data = load_data(data_file)
     
     # Get all cities and time steps
-    cities = sorted(data.keys(), key=int)
-    all_time_steps = set()
-    for city in cities:
-        all_time_steps.update([int(t) for t in data[city].keys() if t.isdigit()])
-    time_steps = sorted(list(all_time_steps))
+    cities, time_steps = get_cities_and_time_steps(data)
     
     print(f"Loading {len(cities)} cities and {len(time_steps)} time steps at once")
     
@@ -433,25 +915,9 @@ def run_static_visualization(data_file):
     # Add all cities first
     visualizer.initialize(cities)
     
-    # Process all data at once
-    for city in cities:
-        for time_step in time_steps:
-            time_str = str(time_step)
-            if time_str in data[city]:
-                visualizer.data[city] = visualizer.data.get(city, {})
-                visualizer.data[city][time_str] = data[city][time_str]
-                
-                # Add to time_steps list if not already present
-                if time_step not in visualizer.time_steps:
-                    visualizer.time_steps.append(time_step)
-    
-    # Sort time_steps
-    visualizer.time_steps.sort()
-    
-    # Update arrays and slider
-    visualizer.update_data_arrays()
-    visualizer.update_slider_range()
-    visualizer.update_plots()
+    # Process all data at once, then replay it
+    visualizer.set_data(data, time_steps)
+    visualizer.animate()
     
     # Show instructions
     print("\nScrolling Instructions:")
@@ -463,19 +929,21 @@ def run_static_visualization(data_file):
     # Show window and wait for close
     plt.show(block=True)
 
-def run_dynamic_visualization(data_file):
-    """Run the visualization with data added incrementally."""
+def run_dynamic_visualization(data_file, verbose=False):
+    """
+    Run the visualization with data added incrementally.
+    
+    Args:
+        data_file (str): Path to the JSON data file
+        verbose (bool): Whether to print every data point as it is added
+    """
     print("Running dynamic visualization...")
     
     # Load all data for simulation
     data = load_data(data_file)
     
     # Get all cities and time steps
-    cities = sorted(data.keys(), key=int)
-    all_time_steps = set()
-    for city in cities:
-        all_time_steps.update([int(t) for t in data[city].keys() if t.isdigit()])
-    time_steps = sorted(list(all_time_steps))
+    cities, time_steps = get_cities_and_time_steps(data)
     
     print(f"Found {len(cities)} cities and {len(time_steps)} time steps")
     
@@ -489,12 +957,18 @@ def run_dynamic_visualization(data_file):
     try:
         for t_idx, time_step in enumerate(time_steps):
             time_str = str(time_step)
-            print(f"Time step {time_step} ({t_idx+1}/{len(time_steps)})")
+            start = time.perf_counter()
+            added = 0
             
             for city in cities:
                 if time_str in data[city]:
-                    print(f"  Adding data for city {city}")
+                    if verbose:
+                        print(f"  Adding data for city {city}")
                     visualizer.add_data_point(city, time_step, data[city][time_str])
+                    added += 1
+            
+            elapsed = time.perf_counter() - start
+            print(f"Time step {time_step} ({t_idx+1}/{len(time_steps)}): added {added} cities in {elapsed*1e3:.1f} ms")
             
             plt.pause(0.5)  # Pause after each time step
             
@@ -504,8 +978,40 @@ def run_dynamic_visualization(data_file):
     # Wait for window to be closed
     visualizer.wait_for_close()
 
-def run_demo():
-    """Run a demo with synthetic data."""
+@njit(cache=True)
+def _sir_substep(S, I, R, N, beta, gamma, dt, num_substeps):
+    """
+    Advance the SIR model for every city by dt, in place, using num_substeps
+    Euler steps for numerical stability. All cities are updated at once.
+    """
+    sub_dt = dt / num_substeps
+    for _ in range(num_substeps):
+        dS = -beta * S * I / N * sub_dt
+        dI = (beta * S * I / N - gamma * I) * sub_dt
+        dR = gamma * I * sub_dt
+        
+        S += dS
+        I += dI
+        R += dR
+        
+        # Ensure non-negative and sum to N
+        S[:] = np.maximum(S, 0.0)
+        I[:] = np.maximum(I, 0.0)
+        R[:] = np.maximum(R, 0.0)
+        
+        total = S + I + R
+        drift = np.abs(total - N) > 1e-9
+        S[:] = np.where(drift, S * N / total, S)
+        I[:] = np.where(drift, I * N / total, I)
+        R[:] = np.where(drift, R * N / total, R)
+
+def run_demo(verbose=False):
+    """
+    Run a demo with synthetic data.
+    
+    Args:
+        verbose (bool): Whether to print every data point as it is added
+    """
     print("Running demo...")
     
     # Create visualizer
@@ -522,62 +1028,38 @@ def run_demo():
     max_time = 100
     time_step = 10
     
-    # Initial conditions
+    # Initial conditions - vary population based on city index
+    city_idx = np.arange(num_cities)
+    N = np.where(city_idx < 3, 101.0, np.where(city_idx < 6, 201.0, 501.0))  # Small, medium, large
+    S = N - 1
+    I = np.ones(num_cities)
+    R = np.zeros(num_cities)
     for city in range(num_cities):
-        # Vary population based on city index
-        if city < 3:
-            N = 101  # Small
-        elif city < 6: 
-            N = 201  # Medium
-        else:
-            N = 501  # Large
-        
-        values = [N-1, 1, 0, N]  # [S, I, R, N]
-        visualizer.add_data_point(city, 0, values)
+        visualizer.add_data_point(city, 0, [S[city], I[city], R[city], N[city]])  # [S, I, R, N]
+    
+    # Model parameters - vary by city
+    beta = 0.2 + 0.03 * city_idx  # Infection rate
+    gamma = 0.1 + 0.01 * city_idx  # Recovery rate
+    num_substeps = 10  # Smaller time steps for stability
     
     # Generate synthetic data
     try:
+        prev_t = 0
         for t in range(time_step, max_time+1, time_step):
-            print(f"Generating data for time step {t}")
+            start = time.perf_counter()
             
+            # Update every city using simple model
+            _sir_substep(S, I, R, N, beta, gamma, t - prev_t, num_substeps)
+            prev_t = t
+            
+            # Add new data points
             for city in range(num_cities):
-                # Get previous values
-                prev_t = max([ts for ts in visualizer.time_steps if ts < t])
-                prev_values = visualizer.data[str(city)][str(prev_t)]
-                
-                S, I, R, N = prev_values
-                
-                # Model parameters - vary by city
-                beta = 0.2 + 0.03 * city  # Infection rate
-                gamma = 0.1 + 0.01 * city  # Recovery rate
-                
-                # Update using simple model - smaller time steps for stability
-                dt = t - prev_t
-                num_substeps = 10
-                sub_dt = dt / num_substeps
-                
-                for _ in range(num_substeps):
-                    dS = -beta * S * I / N * sub_dt
-                    dI = (beta * S * I / N - gamma * I) * sub_dt
-                    dR = gamma * I * sub_dt
-                    
-                    S += dS
-                    I += dI
-                    R += dR
-                    
-                    # Ensure non-negative and sum to N
-                    S = max(0, S)
-                    I = max(0, I)
-                    R = max(0, R)
-                    
-                    total = S + I + R
-                    if abs(total - N) > 1e-9:
-                        S = S * N / total
-                        I = I * N / total
-                        R = R * N / total
-                
-                # Add new data point
-                visualizer.add_data_point(city, t, [S, I, R, N])
+                if verbose:
+                    print(f"  Adding data for city {city}")
+                visualizer.add_data_point(city, t, [S[city], I[city], R[city], N[city]])
+            
+            elapsed = time.perf_counter() - start
+            print(f"Time step {t}: generated {num_cities} cities in {elapsed*1e3:.1f} ms")
             
             plt.pause(0.5)
             
@@ -589,10 +1071,13 @@ def run_demo():
 
 
 # Example of how to use the SIRNVisualizer as an imported module
-def example_external_usage():
+def example_external_usage(verbose=False):
     """
     This shows how your partner might use the SIRNVisualizer class
     in their own script to visualize SIRN data dynamically.
+    
+    Args:
+        verbose (bool): Whether to print every data point as it is added
     """
     # Create a visualizer - will automatically show a window when data is added
     visualizer = SIRNVisualizer(auto_display=True)
@@ -603,7 +1088,7 @@ def example_external_usage():
     
     # Your partner's simulation loop
     for time_step in range(0, 101, 10):
-        print(f"Calculating data for time {time_step}")
+        start = time.perf_counter()
         
         # For each city, calculate or generate data
         for city in cities:
@@ -619,10 +1104,14 @@ def example_external_usage():
             R = N - S - I
             
             # Add the data point - this automatically updates the visualization
+            if verbose:
+                print(f"  Adding data for city {city}")
             visualizer.add_data_point(city, time_step, [S, I, R, N])
         
+        elapsed = time.perf_counter() - start
+        print(f"Time {time_step}: calculated {len(cities)} cities in {elapsed*1e3:.1f} ms")
+        
         # Optional: Add a small delay between time steps for visualization
-        import time
         time.sleep(0.5)
     
     # Keep the window open until manually closed
@@ -640,14 +1129,16 @@ if __name__ == "__main__":
                         help='Visualization mode: static, dynamic, demo, or example')
     parser.add_argument('--cities', type=int, default=None, 
                         help='In demo mode, specify the number of cities to generate')
+    parser.add_argument('--verbose', '-v', action='store_true',
+                        help='Print every data point as it is added')
     
     args = parser.parse_args()
     
     try:
         if args.mode == 'demo':
-            run_demo()
+            run_demo(verbose=args.verbose)
         elif args.mode == 'example':
-            example_external_usage()
+            example_external_usage(verbose=args.verbose)
         elif args.mode == 'static' or args.mode == 'dynamic':
             if not args.data_file:
                 print(f"Error: data_file is required for {args.mode} mode")
@@ -656,7 +1147,7 @@ if __name__ == "__main__":
             if args.mode == 'static':
                 run_static_visualization(args.data_file)
             else:
-                run_dynamic_visualization(args.data_file)
+                run_dynamic_visualization(args.data_file, verbose=args.verbose)
         else:
             print(f"Invalid mode: {args.mode}")
             sys.exit(1)
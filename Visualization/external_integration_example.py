@@ -1,22 +1,13 @@
+import time
 import matplotlib.pyplot as plt
-import json
-from dynamic_visualization import SIRNVisualizer
+from dynamic_visualization import SIRNVisualizer, get_cities_and_time_steps, load_data
 
 
-def load_data(file_path):
-    """Load data from a JSON file."""
-    with open(file_path, 'r') as f:
-        return json.load(f)
-
 # Load all data
 data = load_data('data.json')
 
 # Get all cities and time steps
-cities = sorted(data.keys(), key=int)
-all_time_steps = set()
-for city in cities:
-    all_time_steps.update([int(t) for t in data[city].keys() if t.isdigit()])
-time_steps = sorted(list(all_time_steps))
+cities, time_steps = get_cities_and_time_steps(data)
 
 print(f"Found {len(cities)} cities and {len(time_steps)} time steps")
 
@@ -30,12 +21,16 @@ visualizer.initialize(cities)
 try:
     for t_idx, time_step in enumerate(time_steps):
         time_str = str(time_step)
-        print(f"Time step {time_step} ({t_idx+1}/{len(time_steps)})")
+        start = time.perf_counter()
+        added = 0
         
         for city in cities:
             if time_str in data[city]:
-                print(f"  Adding data for city {city}")
                 visualizer.add_data_point(city, time_step, data[city][time_str])
+                added += 1
+        
+        elapsed = time.perf_counter() - start
+        print(f"Time step {time_step} ({t_idx+1}/{len(time_steps)}): added {added} cities in {elapsed*1e3:.1f} ms")
         
         plt.pause(0.5)  # Pause after each time step
         
@@ -1,8 +1,444 @@
+import gc
 import json
 import numpy as np
 import argparse
 import os
-import random
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+try:
+    from numba import njit, prange
+    numba_available = True
+except ImportError:  # Numba is optional; fall back to NumPy
+    numba_available = False
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
+# Integrators compiled so far, keyed by (num_substeps, stochastic)
+_integrators = {}
+
+def _get_integrator(num_substeps, stochastic):
+    """Return the Euler integrator specialised for the given settings, building it once."""
+    key = (num_substeps, stochastic)
+    if key not in _integrators:
+        _integrators[key] = _make_integrator(num_substeps, stochastic)
+    return _integrators[key]
+
+def _make_integrator(num_substeps, stochastic):
+    """
+    Build an Euler integrator with the number of sub-steps and the choice of
+    model fixed, so Numba compiles them in as constants: the sub-step loop has
+    a known trip count and the unused noise branch is removed.
+    
+    With Numba the cities are integrated in parallel, each with scalar loops;
+    without it, all cities advance together as NumPy array operations.
+    
+    Args:
+        num_substeps (int): Number of sub-steps per time interval
+        stochastic (bool): Whether beta and gamma vary randomly at each sub-step
+        
+    Returns:
+        callable: integrate(S0, I0, R0, N, beta_base, gamma_base, sub_dts, noise, out)
+    """
+    if numba_available:
+        return _make_parallel_integrator(num_substeps, stochastic)
+    return _make_batch_integrator(num_substeps, stochastic)
+
+def _make_parallel_integrator(num_substeps, stochastic):
+    """Build the Numba integrator, which runs one city per parallel iteration."""
+    @njit(parallel=True, cache=True, fastmath=True)
+    def integrate(S0, I0, R0, N, beta_base, gamma_base, sub_dts, noise, out):
+        """Integrate the SIR model for each city in parallel; see _make_batch_integrator."""
+        for c in prange(len(N)):
+            S, I, R = S0[c], I0[c], R0[c]
+            inv_N = 1.0 / N[c]
+            
+            for j in range(len(sub_dts)):
+                # Rates scaled by the sub-step length (and 1/N for infection)
+                sub_dt = sub_dts[j]
+                dt_over_N = sub_dt * inv_N
+                beta_dt_over_N = beta_base[c] * dt_over_N
+                gamma_dt = gamma_base[c] * sub_dt
+                
+                for k in range(num_substeps):
+                    if stochastic:
+                        beta_dt_over_N = beta_base[c] * (1 + noise[c, j, k, 0]) * dt_over_N
+                        gamma_dt = gamma_base[c] * (1 + noise[c, j, k, 1]) * sub_dt
+                    
+                    infection = beta_dt_over_N * S * I
+                    recovery = gamma_dt * I
+                    S = max(S - infection, 0.0)
+                    I = max(I + infection - recovery, 0.0)
+                    R = max(R + recovery, 0.0)
+                
+                # Ensure values sum to N (fix numerical drift); rescaling
+                # unconditionally avoids a branch and costs less than the check
+                scale = N[c] / (S + I + R)
+                S *= scale
+                I *= scale
+                R *= scale
+                
+                out[c, j + 1, 0] = S
+                out[c, j + 1, 1] = I
+                out[c, j + 1, 2] = R
+    
+    return integrate
+
+def _make_batch_integrator(num_substeps, stochastic):
+    """Build the pure-NumPy fallback integrator, used without Numba, which advances all cities together."""
+    def integrate(S0, I0, R0, N, beta_base, gamma_base, sub_dts, noise, out):
+        """
+        Integrate the SIR model for all cities at once with Euler sub-steps.
+        
+        Args:
+            S0, I0, R0 (ndarray): Initial susceptible, infected and recovered counts per city
+            N (ndarray): Total population per city
+            beta_base, gamma_base (ndarray): Infection and recovery rates per city
+            sub_dts (ndarray): Sub-step length for each time interval
+            noise (ndarray): Relative variations of beta and gamma, shape
+                (cities, intervals, num_substeps, 2); unused for the deterministic model
+            out (ndarray): Output array of shape (cities, intervals + 1, 4); [S, I, R]
+                at the end of interval j is written to out[:, j + 1, :3]
+        """
+        S, I, R = S0.copy(), I0.copy(), R0.copy()
+        inv_N = 1.0 / N
+        
+        for j in range(len(sub_dts)):
+            # Rates scaled by the sub-step length (and 1/N for infection), constant
+            # over the interval unless the model is stochastic
+            sub_dt = sub_dts[j]
+            dt_over_N = sub_dt * inv_N
+            beta_dt_over_N = beta_base * dt_over_N
+            gamma_dt = gamma_base * sub_dt
+            
+            # Perform multiple small steps for better numerical stability
+            for k in range(num_substeps):
+                # Add stochastic variations if enabled
+                if stochastic:
+                    beta_dt_over_N = beta_base * (1 + noise[:, j, k, 0]) * dt_over_N
+                    gamma_dt = gamma_base * (1 + noise[:, j, k, 1]) * sub_dt
+                
+                infection = beta_dt_over_N * S * I
+                recovery = gamma_dt * I
+                
+                # Ensure no negative values
+                S = np.maximum(S - infection, 0.0)
+                I = np.maximum(I + infection - recovery, 0.0)
+                R = np.maximum(R + recovery, 0.0)
+            
+            # Ensure values sum to N (fix numerical drift). Each sub-step
+            # conserves S + I + R up to round-off and only the clamps above can
+            # change it, so this is done once per interval rather than every
+            # sub-step, and unconditionally, which costs less than checking.
+            scale = N / (S + I + R)
+            S = S * scale
+            I = I * scale
+            R = R * scale
+            
+            out[:, j + 1, 0] = S
+            out[:, j + 1, 1] = I
+            out[:, j + 1, 2] = R
+    
+    return integrate
+
+def _sir_rhs(y, t, beta, gamma, N):
+    """Right-hand side of the SIR model equations."""
+    S, I, R = y
+    infection = beta * S * I / N
+    return [-infection, infection - gamma * I, gamma * I]
+
+def _sir_jacobian(y, t, beta, gamma, N):
+    """Jacobian of the SIR model equations with respect to [S, I, R]."""
+    S, I, R = y
+    return [[-beta * I / N, -beta * S / N, 0.0],
+            [beta * I / N, beta * S / N - gamma, 0.0],
+            [0.0, gamma, 0.0]]
+
+def _odeint_solver():
+    """Build a solve function for the "odeint" engine, using SciPy's LSODA."""
+    try:
+        from scipy.integrate import odeint
+    except ImportError:
+        raise ImportError('The "odeint" engine requires scipy: pip install scipy')
+    
+    def solve(y0, times, beta, gamma, N):
+        solution = odeint(_sir_rhs, y0, times, args=(beta, gamma, N),
+                          Dfun=_sir_jacobian, rtol=1e-8, atol=1e-8)
+        return solution[1:]
+    return solve
+
+def _numbalsoda_solver():
+    """Build a solve function for the "numbalsoda" engine, LSODA with a compiled right-hand side."""
+    try:
+        from numba import carray, cfunc
+        from numbalsoda import lsoda, lsoda_sig
+    except ImportError:
+        raise ImportError('The "numbalsoda" engine requires numbalsoda: pip install numbalsoda')
+    
+    @cfunc(lsoda_sig, cache=True)
+    def rhs(t, y, dy, p):
+        y_ = carray(y, (3,))
+        beta, gamma, N = carray(p, (3,))
+        infection = beta * y_[0] * y_[1] / N
+        dy[0] = -infection
+        dy[1] = infection - gamma * y_[1]
+        dy[2] = gamma * y_[1]
+    
+    def solve(y0, times, beta, gamma, N):
+        solution, success = lsoda(rhs.address, np.asarray(y0, dtype=np.float64),
+                                  np.asarray(times, dtype=np.float64),
+                                  data=np.array([beta, gamma, N]), rtol=1e-8, atol=1e-8)
+        if not success:
+            raise RuntimeError("numbalsoda failed to integrate the SIR model")
+        return solution[1:]
+    return solve
+
+# Adaptive ODE solver engines, each mapped to a builder of its solve function,
+# and the solve functions built so far
+_ode_solvers = {
+    "odeint": _odeint_solver,
+    "numbalsoda": _numbalsoda_solver,
+}
+_built_solvers = {}
+
+def _get_ode_solver(engine):
+    """Return the solve function for an adaptive solver engine, building it once."""
+    if engine not in _built_solvers:
+        _built_solvers[engine] = _ode_solvers[engine]()
+    return _built_solvers[engine]
+
+def _solve_city(solve, S0, I0, R0, N, beta_base, gamma_base, time_points, noise):
+    """
+    Integrate the SIR model for one city with an adaptive ODE solver.
+    
+    Args:
+        solve (callable): solve(y0, times, beta, gamma, N) returning [S, I, R]
+            at times[1:], from _get_ode_solver
+        S0, I0, R0 (float): Initial susceptible, infected and recovered counts
+        N (float): Total population
+        beta_base, gamma_base (float): Infection and recovery rates
+        time_points (ndarray): Time points to report, in increasing order
+        noise (ndarray): Relative variations of beta and gamma for each time
+            interval, shape (intervals, 2), or None for the deterministic model
+        
+    Returns:
+        ndarray: [S, I, R] at each time point, shape (len(time_points), 3)
+    """
+    y0 = [S0, I0, R0]
+    if noise is None:
+        # One solve over the whole trajectory
+        return solve(y0, np.concatenate([[0], time_points]), beta_base, gamma_base, N)
+    
+    # Solve each interval separately with its own perturbed parameters
+    trajectory = np.empty((len(time_points), 3))
+    previous_t = 0
+    for j, t in enumerate(time_points):
+        beta = beta_base * (1 + noise[j, 0])
+        gamma = gamma_base * (1 + noise[j, 1])
+        y0 = trajectory[j] = solve(y0, [previous_t, t], beta, gamma, N)[-1]
+        previous_t = t
+    return trajectory
+
+def _draw_noise(random_seed, num_cities, shape):
+    """
+    Draw 5% relative random variations of beta and gamma for every city.
+    
+    Each city draws from its own generator spawned from the seed, so its
+    variations do not depend on how many cities there are or the order they
+    are simulated in.
+    
+    Args:
+        random_seed (int): Seed for reproducibility, or None
+        num_cities (int): Number of cities
+        shape (tuple): Shape of each city's variations
+        
+    Returns:
+        ndarray: Variations of shape (num_cities,) + shape
+    """
+    # Drawn straight into the array and scaled in place, so the (potentially
+    # very large) array is never copied
+    noise = np.empty((num_cities,) + tuple(shape))
+    for city, seed in enumerate(np.random.SeedSequence(random_seed).spawn(num_cities)):
+        np.random.default_rng(seed).standard_normal(out=noise[city])
+    noise *= 0.05
+    return noise
+
+def generate_sirn_array(
+    num_cities=3, 
+    max_time=100, 
+    time_step=10, 
+    initial_infected=1,
+    vary_params=True, 
+    custom_populations=None,
+    random_seed=None,
+    stochastic=False,
+    engine="euler"
+):
+    """
+    Generate synthetic SIRN model trajectories for multiple cities as one array.
+    
+    Takes the same arguments as generate_sirn_data, apart from output_file and output_dir.
+    
+    Returns:
+        tuple: (time_points, trajectory) where time_points is an integer ndarray
+        of every time step starting at 0, and trajectory is an ndarray of shape
+        (num_cities, len(time_points), 4) holding [S, I, R, N] values
+    """
+    if engine in _ode_solvers:
+        solve = _get_ode_solver(engine)
+    elif engine != "euler":
+        raise ValueError(f'Unknown engine {engine!r}, expected "euler" or one of {sorted(_ode_solvers)}')
+    
+    # Generate default populations if not provided: the first third small
+    # cities, the second third medium and the rest large
+    if custom_populations is None:
+        small, medium = num_cities // 3, 2 * num_cities // 3
+        populations = np.concatenate([np.full(small, 100.0), np.full(medium - small, 200.0),
+                                      np.full(num_cities - medium, 500.0)])
+    else:
+        # Ensure we have enough populations, padding with the default
+        populations = np.asarray(custom_populations, dtype=float)[:num_cities]
+        populations = np.pad(populations, (0, num_cities - len(populations)), constant_values=100)
+    
+    # Initial conditions for all cities at once
+    N = populations + initial_infected
+    S0 = N - initial_infected
+    I0 = np.full(num_cities, float(initial_infected))
+    R0 = np.zeros(num_cities)
+    
+    # Set model parameters (can vary by city)
+    if vary_params:
+        city_idx = np.arange(num_cities)
+        # Infection rate increases with city index
+        beta_base = 0.2 + 0.05 * city_idx
+        # Recovery rate slightly increases with city index
+        gamma_base = 0.1 + 0.01 * city_idx
+    else:
+        # Fixed parameters
+        beta_base = np.full(num_cities, 0.3)
+        gamma_base = np.full(num_cities, 0.1)
+    
+    # Generate time series data, ending at max_time even if it is not a
+    # multiple of time_step
+    time_points = np.arange(time_step, max_time + 1, time_step, dtype=np.int64)
+    if max_time % time_step != 0:
+        time_points = np.append(time_points, max_time)
+    
+    # One contiguous [S, I, R, N] array, starting with the initial conditions at t=0
+    trajectory = np.empty((num_cities, len(time_points) + 1, 4))
+    trajectory[:, 0, 0] = S0
+    trajectory[:, 0, 1] = I0
+    trajectory[:, 0, 2] = R0
+    trajectory[:, :, 3] = N[:, np.newaxis]
+    
+    if engine != "euler":
+        # The adaptive solvers vary the parameters once per time interval
+        noise = _draw_noise(random_seed, num_cities, (len(time_points), 2)) if stochastic else None
+        for city in range(num_cities):
+            trajectory[city, 1:, :3] = _solve_city(solve, S0[city], I0[city], R0[city], N[city],
+                                                   beta_base[city], gamma_base[city], time_points,
+                                                   None if noise is None else noise[city])
+    else:
+        # For numerical stability, use smaller steps for integration
+        num_substeps = 10  # Number of sub-steps for numerical integration
+        sub_dts = np.diff(time_points, prepend=0) / num_substeps
+        
+        # Draw the random variations for all intervals and sub-steps up front
+        if stochastic:
+            noise = _draw_noise(random_seed, num_cities, (len(time_points), num_substeps, 2))
+        else:
+            noise = np.empty((0, len(time_points), num_substeps, 2))
+        
+        integrate = _get_integrator(num_substeps, stochastic)
+        integrate(S0, I0, R0, N, beta_base, gamma_base, sub_dts, noise, trajectory)
+    
+    return np.concatenate([[0], time_points]), trajectory
+
+def sirn_array_to_dict(time_points, trajectory):
+    """
+    Convert an array from generate_sirn_array to the nested dict data format.
+    
+    Args:
+        time_points (ndarray): Time steps, one per column of trajectory
+        trajectory (ndarray): [S, I, R, N] values, shape (cities, time steps, 4)
+        
+    Returns:
+        dict: SIRN data of the form {city: {time_step: [S, I, R, N]}}
+    """
+    # Key strings are formatted once up front, not per (city, time) pair, and
+    # the whole array is converted to Python floats in a single call
+    city_keys = list(map(str, range(len(trajectory))))
+    time_keys = time_points.astype(str).tolist()
+    return {city_key: dict(zip(time_keys, city_values))
+            for city_key, city_values in zip(city_keys, trajectory.tolist())}
+
+def _write_json(path, data):
+    """Write data to a JSON file with a two-space indent."""
+    # orjson's encoder is much faster on large numeric data, with the same layout
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+def _write_one_city(city_key, city_trajectory, time_keys, output_dir):
+    """
+    Write one city's data to its own file in output_dir.
+    
+    The file has the same {city: {time_step: [S, I, R, N]}} layout as the
+    single output file, so each shard can also be loaded on its own.
+    
+    Returns:
+        str: Name of the file written, relative to output_dir
+    """
+    file_name = f"city_{city_key}.json"
+    _write_json(os.path.join(output_dir, file_name),
+                {city_key: dict(zip(time_keys, city_trajectory.tolist()))})
+    return file_name
+
+# Below this many cities the shards are written serially, as starting the
+# worker processes takes longer than encoding the files
+_parallel_shard_min_cities = 5000
+
+def write_sirn_shards(time_points, trajectory, output_dir):
+    """
+    Write an array from generate_sirn_array as one JSON file per city.
+    
+    A manifest.json mapping each city to its file is written alongside them.
+    With many cities the files are encoded in parallel worker processes,
+    which are spawned and so re-import the main module: a script calling
+    this (or generate_sirn_data with output_dir) must guard its own code
+    with if __name__ == "__main__":.
+    
+    Args:
+        time_points (ndarray): Time steps, one per column of trajectory
+        trajectory (ndarray): [S, I, R, N] values, shape (cities, time steps, 4)
+        output_dir (str): Directory to write the files to, created if needed
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    city_keys = list(map(str, range(len(trajectory))))
+    time_keys = time_points.astype(str).tolist()
+    
+    if len(city_keys) < _parallel_shard_min_cities:
+        file_names = list(map(_write_one_city, city_keys, trajectory,
+                              repeat(time_keys), repeat(output_dir)))
+    else:
+        # Hand the cities to the workers in batches to keep the pickling overhead low.
+        # The workers are spawned rather than forked, as forking after Numba's
+        # parallel integrator has started its thread pool can deadlock.
+        chunksize = max(1, len(city_keys) // (4 * (os.cpu_count() or 1)))
+        with ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn")) as executor:
+            file_names = list(executor.map(_write_one_city, city_keys, trajectory,
+                                           repeat(time_keys), repeat(output_dir),
+                                           chunksize=chunksize))
+    
+    _write_json(os.path.join(output_dir, "manifest.json"),
+                {"time_steps": time_points.tolist(), "cities": dict(zip(city_keys, file_names))})
 
 def generate_sirn_data(
     num_cities=3, 
@@ -13,7 +449,9 @@ def generate_sirn_data(
     custom_populations=None,
     random_seed=None,
     stochastic=False,
-    output_file=None
+    output_file=None,
+    engine="euler",
+    output_dir=None
 ):
     """
     Generate synthetic SIRN model data for multiple cities.
@@ -28,117 +466,41 @@ def generate_sirn_data(
         random_seed (int): Seed for random number generator (for reproducibility)
         stochastic (bool): Whether to add random variations to the model
         output_file (str): Path to output JSON file, or None to just return the data
+        engine (str): Integrator to use: "euler" for fixed Euler sub-steps, or an
+            adaptive solver: "odeint" (SciPy's LSODA, requires scipy) or "numbalsoda"
+            (compiled LSODA, requires numbalsoda)
+        output_dir (str): Directory to write one JSON file per city to, plus a
+            manifest.json listing them, or None to skip; see write_sirn_shards
+            for the __main__ guard this needs with many cities
         
     Returns:
         dict: SIRN data in the specified format
     """
-    # Set random seed for reproducibility
-    if random_seed is not None:
-        random.seed(random_seed)
-        np.random.seed(random_seed)
-    
-    # Create data structure
-    data = {}
-    
-    # Generate default populations if not provided
-    if custom_populations is None:
-        custom_populations = []
-        for i in range(num_cities):
-            if i < num_cities // 3:
-                custom_populations.append(100)  # Small city
-            elif i < 2 * num_cities // 3:
-                custom_populations.append(200)  # Medium city
-            else:
-                custom_populations.append(500)  # Large city
-    
-    # Ensure we have enough populations
-    while len(custom_populations) < num_cities:
-        custom_populations.append(100)  # Default
-    
-    # Generate data for each city
-    for city in range(num_cities):
-        city_str = str(city)
-        data[city_str] = {}
-        
-        # Get city population
-        N = custom_populations[city] + initial_infected
-        
-        # Set initial conditions
-        S0 = N - initial_infected
-        I0 = initial_infected
-        R0 = 0
-        
-        # Initial data point at t=0
-        data[city_str]["0"] = [float(S0), float(I0), float(R0), float(N)]
-        
-        # Set model parameters (can vary by city)
-        if vary_params:
-            # Infection rate increases with city index
-            beta_base = 0.2 + 0.05 * city
-            # Recovery rate slightly increases with city index
-            gamma_base = 0.1 + 0.01 * city
-        else:
-            # Fixed parameters
-            beta_base = 0.3
-            gamma_base = 0.1
-        
-        # Current values
-        S, I, R = S0, I0, R0
-        
-        # Generate time series data
-        time_points = list(range(time_step, max_time + 1, time_step))
-        if max_time not in time_points and max_time % time_step != 0:
-            time_points.append(max_time)
-            
-        for t in time_points:
-            # For numerical stability, use smaller steps for integration
-            previous_t = time_points[time_points.index(t) - 1] if time_points.index(t) > 0 else 0
-            dt = t - previous_t
-            num_substeps = 10  # Number of sub-steps for numerical integration
-            sub_dt = dt / num_substeps
-            
-            # Perform multiple small steps for better numerical stability
-            for _ in range(num_substeps):
-                # Add stochastic variations if enabled
-                if stochastic:
-                    beta = beta_base * (1 + np.random.normal(0, 0.05))  # 5% random variation
-                    gamma = gamma_base * (1 + np.random.normal(0, 0.05))  # 5% random variation
-                else:
-                    beta = beta_base
-                    gamma = gamma_base
-                
-                dS = -beta * S * I / N * sub_dt
-                dI = (beta * S * I / N - gamma * I) * sub_dt
-                dR = gamma * I * sub_dt
-                
-                S += dS
-                I += dI
-                R += dR
-                
-                # Ensure no negative values
-                S = max(0, S)
-                I = max(0, I)
-                R = max(0, R)
-                
-                # Ensure values sum to N (fix numerical drift)
-                total = S + I + R
-                if abs(total - N) > 1e-9:  # Only correct if there's significant drift
-                    S = S * N / total
-                    I = I * N / total
-                    R = R * N / total
-            
-            # Store data point
-            data[city_str][str(t)] = [float(S), float(I), float(R), float(N)]
+    time_points, trajectory = generate_sirn_array(
+        num_cities=num_cities,
+        max_time=max_time,
+        time_step=time_step,
+        initial_infected=initial_infected,
+        vary_params=vary_params,
+        custom_populations=custom_populations,
+        random_seed=random_seed,
+        stochastic=stochastic,
+        engine=engine
+    )
+    data = sirn_array_to_dict(time_points, trajectory)
     
     # Write to JSON file if output_file is specified
     if output_file:
         # Create directory if it doesn't exist
         os.makedirs(os.path.dirname(output_file) if os.path.dirname(output_file) else '.', exist_ok=True)
-        
-        with open(output_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        _write_json(output_file, data)
         print(f"Generated SIRN data for {num_cities} cities saved to {output_file}")
     
+    # Write one file per city if output_dir is specified
+    if output_dir:
+        write_sirn_shards(time_points, trajectory, output_dir)
+        print(f"Generated SIRN data for {num_cities} cities saved to {output_dir}, one file per city")
+    
     return data
 
 def print_data_preview(data, num_cities=3, num_timesteps=3):
@@ -148,7 +510,8 @@ def print_data_preview(data, num_cities=3, num_timesteps=3):
     for city in list(data.keys())[:city_count]:
         print(f"City {city}:")
         
-        timesteps = sorted(data[city].keys(), key=lambda x: int(x))
+        # Time points are inserted in ascending order, so no sort is needed
+        timesteps = list(data[city].keys())
         timestep_count = min(num_timesteps, len(timesteps))
         
         for timestep in timesteps[:timestep_count]:
@@ -166,14 +529,22 @@ if __name__ == "__main__":
     parser.add_argument("--time-step", type=int, default=10, help="Time step interval")
     parser.add_argument("--initial-infected", type=int, default=1, help="Initial infected count")
     parser.add_argument("--output", default="sirn_data.json", help="Output JSON file")
+    parser.add_argument("--output-dir", help="Write one JSON file per city to this directory instead of --output")
     parser.add_argument("--fixed-params", action="store_true", help="Use fixed parameters for all cities")
     parser.add_argument("--populations", type=int, nargs="*", help="Population for each city")
     parser.add_argument("--seed", type=int, help="Random seed for reproducibility")
     parser.add_argument("--stochastic", action="store_true", help="Add random variations to the model")
     parser.add_argument("--preview", action="store_true", help="Print a preview of the generated data")
+    parser.add_argument("--engine", choices=["euler", "odeint", "numbalsoda"], default="euler",
+                        help="Integrator: fixed Euler sub-steps, or an adaptive ODE solver")
     
     args = parser.parse_args()
     
+    # The data holds millions of small lists that cannot form reference cycles,
+    # so the cyclic garbage collector is switched off for this short-lived
+    # process rather than left to scan them repeatedly
+    gc.disable()
+    
     data = generate_sirn_data(
         num_cities=args.cities,
         max_time=args.max_time,
@@ -183,7 +554,9 @@ if __name__ == "__main__":
         custom_populations=args.populations,
         random_seed=args.seed,
         stochastic=args.stochastic,
-        output_file=args.output
+        output_file=None if args.output_dir else args.output,
+        engine=args.engine,
+        output_dir=args.output_dir
     )
     
     if args.preview: